@@ -0,0 +1,18 @@
+import uuid
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import ORJSONResponse as BaseORJSONResponse
+
+
+def orjson_default(value):
+    """Fallback for what orjson won't take: Decimal money and asyncpg's own UUID type, as strings."""
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONResponse(BaseORJSONResponse):
+    """fastapi's ORJSONResponse plus orjson_default, so money and ids never 500 a JSON route."""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=orjson_default)
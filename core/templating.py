@@ -1,17 +1,25 @@
 
-import re
 from datetime import datetime
 from fastapi import Request
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from functools import wraps
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
 from utils.helpers import get_current_user
 
-READ_ONLY_FIELDS = {"id", "created_at", "created_by"}
-PHONE_REGEX = re.compile(r"^\+?254[17]\d{8}$|^0[17]\d{8}$")
+READ_ONLY_FIELDS = frozenset({"id", "created_at", "created_by"})
 
-templates = Jinja2Templates(directory="templates")
+# Templates only change on deploy: keep every compiled template, never stat for changes,
+# and share compiled bytecode between workers/restarts through the temp directory
+env = Environment(
+    loader=FileSystemLoader("templates"),
+    autoescape=True,
+    auto_reload=False,
+    cache_size=-1,
+    bytecode_cache=FileSystemBytecodeCache(),
+)
+templates = Jinja2Templates(env=env)
 
 templates.env.globals["now"] = datetime.now
 
@@ -23,11 +31,52 @@ def format_amount(value):
 
 templates.env.filters["amount"] = format_amount
 
+def is_valid_phone(phone, allow_bare_254=True):
+    """Kenyan mobile check: 07/01XXXXXXXX, +2547/1XXXXXXXX or (optionally) 2547/1XXXXXXXX."""
+    if phone.startswith("0"):
+        rest = phone[1:]
+    elif phone.startswith("+254"):
+        rest = phone[4:]
+    elif allow_bare_254 and phone.startswith("254"):
+        rest = phone[3:]
+    else:
+        return False
+    return len(rest) == 9 and rest[0] in "17" and rest.isascii() and rest.isdigit()
+
+def normalize_phone(phone):
+    """Canonicalize a validated Kenyan mobile number to 2547XXXXXXXX / 2541XXXXXXXX."""
+    phone = phone.strip().lstrip("+")
+    if phone.startswith("0"):
+        phone = phone[1:]
+    elif phone.startswith("254"):
+        phone = phone[3:]
+    return "254" + phone
+
+def normalize_text(value, upper=True):
+    """Strip and case-fold a form value in one pass; blank input becomes None."""
+    if not value:
+        return None
+    value = value.strip()
+    if not value:
+        return None
+    return value.upper() if upper else value.lower()
+
+def precompile_templates():
+    """Parse and compile every template up front so the first request doesn't pay for it."""
+    for name in env.list_templates(extensions=["html"]):
+        env.get_template(name)
+
+def stream_template(name: str, context: dict, buffer_size: int = 50) -> StreamingResponse:
+    """Render `name` incrementally so large tables start flushing before the last row is formatted."""
+    generator = templates.get_template(name).stream(context)
+    generator.enable_buffering(buffer_size)
+    return StreamingResponse(generator, media_type="text/html")
+
 def login_required(func):
     @wraps(func)
     async def wrapper(request: Request, **kwargs):
         user_or_redirect = await get_current_user(request)
-        if isinstance(user_or_redirect, RedirectResponse):
+        if type(user_or_redirect) is RedirectResponse:
             return user_or_redirect
 
         # Attach to request.state instead of passing as arg
@@ -1,12 +1,15 @@
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.responses import RedirectResponse
 from fastapi.staticfiles import StaticFiles
 
+from core.responses import ORJSONResponse
+from core.templating import precompile_templates
 from routes import apartments, dashboard, house_units, landlords, login, tenants
-from utils.database import init_db
+from utils.database import ensure_partitions, init_db, maintain_partitions
 
 # Global logging configuration (applies to all modules)
 logging.basicConfig(
@@ -19,11 +22,18 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    await ensure_partitions()
+    precompile_templates()
+    partitions_task = asyncio.create_task(maintain_partitions())
     yield
+    partitions_task.cancel()
 
+# Routes without an explicit response_class serialize JSON through orjson;
+# Decimal and UUID values fall back to strings (see core.responses)
 app = FastAPI(
     title="Matrix PMS", 
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Mount static files (CSS, JS, images...)
@@ -1,17 +1,18 @@
 
 import logging, uuid
-from datetime import datetime
+from decimal import Decimal
 from typing import Dict, Optional, Tuple
 
 from fastapi import APIRouter, Depends, Form, Query, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import func, select
 from typing import Annotated
 
 from core.templating import READ_ONLY_FIELDS, templates
 from utils.database import get_session
-from utils.helpers import get_landlords, require_user
+from utils.helpers import bump_lookup_version, get_landlords, require_user
 from utils.models import Apartments, House_Units, Landlords, Occupancy, Users
 
 logger = logging.getLogger(__name__)
@@ -37,9 +38,9 @@ def normalize_apartment_data(
     name: str,
     location: str,
     landlord_id: str,
-    water_unit_rate: float, 
-    garbage_charge: float, 
-    service_charge: float
+    water_unit_rate: Decimal, 
+    garbage_charge: Decimal, 
+    service_charge: Decimal
 ) -> Dict:
     return {
         "name": name.strip().upper(),
@@ -78,8 +79,8 @@ async def update_apartment(
                 setattr(apartment, field, value)
 
         apartment.updated_by = current_user.id
-        apartment.updated_at = datetime.utcnow()
 
+        await bump_lookup_version(session)
         await session.commit()
         await session.refresh(apartment)
 
@@ -123,7 +124,11 @@ async def render_apartments(
         )
         .join(Landlords, Apartments.landlord_id == Landlords.id, isouter=True)
         .join(House_Units, House_Units.apartment_id == Apartments.id, isouter=True)
-        .join(Occupancy, Occupancy.house_unit_id == House_Units.id and Occupancy.end_date is None , isouter=True)
+        .join(
+            Occupancy,
+            and_(Occupancy.house_unit_id == House_Units.id, Occupancy.end_date.is_(None)),
+            isouter=True,
+        )
         .where(*filters)
         .group_by(Apartments.id, Landlords.id)
         .order_by(Apartments.name)
@@ -224,7 +229,7 @@ async def fetch(
     landlord_id: Optional[str] = Query(None),
     show_deleted: bool = Query(False),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     landlord_uuid, errors = parse_uuid(landlord_id, "Invalid landlord ID")
@@ -242,7 +247,7 @@ async def post(
     delete_id: Optional[str] = Form(None),
     restore_id: Optional[str] = Form(None),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     landlord_uuid, errors = parse_uuid(landlord_id, "Invalid landlord ID")
@@ -269,7 +274,7 @@ async def new_apartment_form(
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     return await render_new_apartment(request, session)
@@ -283,21 +288,21 @@ async def create_apartment(
     name: str = Form(...),
     location: str = Form(...),
     landlord_id: str = Form(...),
-    water_unit_rate: float = Form(...),
-    garbage_charge: float = Form(...),
-    service_charge: float = Form(...),
+    water_unit_rate: Decimal = Form(...),
+    garbage_charge: Decimal = Form(...),
+    service_charge: Decimal = Form(...),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
     
     apartment = Apartments(
         **normalize_apartment_data(name, location, landlord_id, water_unit_rate, garbage_charge, service_charge),
-        created_at=datetime.utcnow(),
         created_by=current_user.id,
     )
 
     try:
         session.add(apartment)
+        await bump_lookup_version(session)
         await session.commit()
         return await render_new_apartment(
             request,
@@ -317,7 +322,7 @@ async def edit_apartment_form(
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     apartment_id, errors = parse_uuid(id, "Invalid apartment ID")
@@ -336,11 +341,11 @@ async def edit_apartment(
     name: str = Form(...),
     location: str = Form(...),
     landlord_id: str = Form(...),
-    water_unit_rate: float = Form(...),
-    garbage_charge: float = Form(...),
-    service_charge: float = Form(...),
+    water_unit_rate: Decimal = Form(...),
+    garbage_charge: Decimal = Form(...),
+    service_charge: Decimal = Form(...),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     success, errors, _ = await update_apartment(
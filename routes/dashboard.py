@@ -21,7 +21,7 @@ async def get_dashboard(
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session)  # still available if needed
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
     
     stmt = select(
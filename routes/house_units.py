@@ -1,5 +1,5 @@
 import logging, uuid
-from datetime import datetime
+from decimal import Decimal
 from typing import Annotated, Dict, Optional, Tuple
 
 from fastapi import APIRouter, Depends, Form, Query, Request
@@ -9,7 +9,7 @@ from sqlmodel import select
 
 from core.templating import READ_ONLY_FIELDS, templates
 from utils.database import get_session
-from utils.helpers import get_apartments, get_landlords, require_user
+from utils.helpers import bump_lookup_version, get_apartments, get_landlords, require_user
 from utils.models import Apartments, House_Units, Landlords, Tenants, Users
 
 logger = logging.getLogger(__name__)
@@ -68,9 +68,9 @@ async def update_house_unit(
             if field not in READ_ONLY_FIELDS:
                 setattr(house_unit, field, value)
 
-        house_unit.updated_at = datetime.utcnow()
         house_unit.updated_by = current_user.id
 
+        await bump_lookup_version(session)
         await session.commit()
         await session.refresh(house_unit)
 
@@ -292,7 +292,7 @@ async def fetch(
     status: Optional[str] = Query(None),
     show_deleted: bool = Query(False),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     landlord_uuid, err1 = parse_uuid(landlord_id, "Invalid landlord ID")
@@ -321,7 +321,7 @@ async def post(
     restore_id: Optional[str] = Form(None),
     show_deleted: bool = Query(False),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     landlord_uuid, err1 = parse_uuid(landlord_id, "Invalid landlord ID")
@@ -357,7 +357,7 @@ async def new_house_unit_form(
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     return await render_new_house_unit(request, session)
@@ -370,26 +370,35 @@ async def create_house_unit(
     session: AsyncSession = Depends(get_session),
     name: str = Form(...),
     apartment_id: str = Form(...),
-    rent: float = Form(...),
-    rent_deposit: float = Form(...),
-    water_deposit: Optional[float] = Form(None),
-    electricity_deposit: Optional[float] = Form(None),
-    other_deposits: Optional[float] = Form(None),
+    rent: Decimal = Form(...),
+    rent_deposit: Decimal = Form(...),
+    water_deposit: Optional[Decimal] = Form(None),
+    electricity_deposit: Optional[Decimal] = Form(None),
+    other_deposits: Optional[Decimal] = Form(None),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     success = errors = ''
-    
-    data = normalize_house_unit_data(locals())
+
+    form_data = {
+        "name": name,
+        "apartment_id": apartment_id,
+        "rent": rent,
+        "rent_deposit": rent_deposit,
+        "water_deposit": water_deposit,
+        "electricity_deposit": electricity_deposit,
+        "other_deposits": other_deposits,
+    }
+    data = normalize_house_unit_data(form_data)
     house_unit = House_Units(
         **data,
-        created_at=datetime.utcnow(),
         created_by=current_user.id,
     )
     
     try:
         session.add(house_unit)
+        await bump_lookup_version(session)
         await session.commit()
         success = f"House Unit `{house_unit.name}` created successfully"
 
@@ -403,7 +412,7 @@ async def create_house_unit(
         session, 
         success=success,
         errors=errors,
-        form_data=locals()
+        form_data=form_data
     )
     
 
@@ -414,7 +423,7 @@ async def edit_house_unit_form(
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
     
     house_unit_id, errors = parse_uuid(id, "Invalid house unit ID")
@@ -435,16 +444,25 @@ async def edit_house_unit(
     session: AsyncSession = Depends(get_session),
     name: str = Form(...),
     apartment_id: str = Form(...),
-    rent: float = Form(...),
-    rent_deposit: float = Form(...),
-    water_deposit: Optional[float] = Form(None),
-    electricity_deposit: Optional[float] = Form(None),
-    other_deposits: Optional[float] = Form(None),
+    rent: Decimal = Form(...),
+    rent_deposit: Decimal = Form(...),
+    water_deposit: Optional[Decimal] = Form(None),
+    electricity_deposit: Optional[Decimal] = Form(None),
+    other_deposits: Optional[Decimal] = Form(None),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
-    data = normalize_house_unit_data(locals())
+    form_data = {
+        "name": name,
+        "apartment_id": apartment_id,
+        "rent": rent,
+        "rent_deposit": rent_deposit,
+        "water_deposit": water_deposit,
+        "electricity_deposit": electricity_deposit,
+        "other_deposits": other_deposits,
+    }
+    data = normalize_house_unit_data(form_data)
     success, errors, _ = await update_house_unit(
         session,
         current_user,
@@ -469,7 +487,7 @@ async def tenant_details(
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session)
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
     
     house_unit_id, errors = parse_uuid(id, "Invalid house unit ID")
@@ -1,28 +1,97 @@
-import logging, uuid
-from collections import Counter
-from datetime import datetime, timedelta
+import hashlib, logging, uuid
+from datetime import timedelta
+from decimal import Decimal
 from typing import Dict, Optional, Tuple, Annotated
 
-from fastapi import APIRouter, Depends, Form, Query, Request
+import orjson
+from fastapi import APIRouter, Depends, Form, Query, Request, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy import and_
+from pydantic import BaseModel, field_validator
+from sqlalchemy import String, cast, literal
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from sqlmodel import select, func
 
-from core.templating import PHONE_REGEX, READ_ONLY_FIELDS, templates
+from core.responses import ORJSONResponse
+from core.templating import READ_ONLY_FIELDS, is_valid_phone, normalize_text, stream_template, templates
 from utils.database import get_session
-from utils.helpers import require_user
-from utils.models import Apartments, Landlords, Licenses, Packages, Users
+from utils.helpers import bump_lookup_version, get_cached, get_trial_package, require_user
+from utils.models import Apartments, Landlords, Licenses, Users
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Built once at import; per-request code only binds parameters
+APARTMENTS_COUNT = (
+    select(func.count(Apartments.id))
+    .where(
+        Apartments.landlord_id == Landlords.id,
+        Apartments.status != "deleted",
+    )
+    .correlate(Landlords)
+    .scalar_subquery()
+)
+
+# Plain columns, no entity: the list is read-only so ORM hydration would be wasted.
+# The id comes back as text so the cached rows go straight to orjson
+LANDLORDS_STMT = (
+    select(
+        cast(Landlords.id, String).label("id"),
+        Landlords.name,
+        Landlords.email,
+        func.coalesce(Landlords.phone_e164, Landlords.phone).label("phone"),
+        Landlords.id_number,
+        Landlords.status,
+        APARTMENTS_COUNT.label("apartments")
+    )
+    .order_by(Landlords.name)
+)
+ACTIVE_LANDLORDS_STMT = LANDLORDS_STMT.where(Landlords.status != "deleted")
+
+HAS_APARTMENTS = (
+    select(Apartments.id)
+    .where(
+        Apartments.landlord_id == Landlords.id,
+        Apartments.status != "deleted",
+    )
+    .correlate(Landlords)
+    .exists()
+)
+
+LANDLORD_STATS_STMT = select(
+    func.count(),
+    func.count().filter(Landlords.status == "active"),
+    func.count().filter(Landlords.status == "inactive"),
+    func.count().filter(HAS_APARTMENTS),
+).select_from(Landlords)
+ACTIVE_LANDLORD_STATS_STMT = LANDLORD_STATS_STMT.where(Landlords.status != "deleted")
+
 
 # ------------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------------
 
+class LandlordForm(BaseModel):
+    """Landlord create/edit fields, parsed from the form body in one pydantic-core pass."""
+    name: str
+    email: str
+    phone: str
+    id_number: str
+    kra_pin: Optional[str] = None
+    address: Optional[str] = None
+    bank_name: Optional[str] = None
+    bank_account: Optional[str] = None
+    commission_rate: Optional[Decimal] = None
+
+    @field_validator("commission_rate", mode="before")
+    @classmethod
+    def blank_as_none(cls, value):
+        # The form always posts the field; left empty it means "no rate", not a parse error
+        return None if value == "" else value
+
+
 def parse_uuid(value: Optional[str], error_msg: str) -> Tuple[Optional[uuid.UUID], Optional[str]]:
     if not value:
         return None, None
@@ -38,7 +107,7 @@ def validate_landlord_form(
     email: str,
     phone: str,
     id_number: str,
-    commission_rate: Optional[float],
+    commission_rate: Optional[Decimal],
 ) -> Dict[str, str]:
     errors = {}
 
@@ -54,7 +123,7 @@ def validate_landlord_form(
     if not phone.strip():
         errors["phone"] = "phone Number is required"
 
-    if phone and not PHONE_REGEX.match(phone):
+    if phone and not is_valid_phone(phone):
         errors["phone"] = "Invalid phone number format"
 
     if commission_rate is not None and not (0 <= commission_rate <= 100):
@@ -63,27 +132,17 @@ def validate_landlord_form(
     return errors
 
 
-def normalize_landlord_data(
-    name: str,
-    email: str,
-    phone: str,
-    id_number: str,
-    kra_pin: Optional[str],
-    address: Optional[str],
-    bank_name: Optional[str],
-    bank_account: Optional[str],
-    commission_rate: Optional[float],
-) -> Dict:
+def normalize_landlord_data(data: Dict) -> Dict:
     return {
-        "name": name.strip().upper(),
-        "email": email.strip().lower(),
-        "phone": "254" + phone.strip()[-9:],
-        "id_number": id_number.strip(),
-        "kra_pin": kra_pin.strip().upper() if kra_pin else None,
-        "address": address.strip().upper() if address else None,
-        "bank_name": bank_name.strip().upper() if bank_name else None,
-        "bank_account": bank_account.strip().upper() if bank_account else None,
-        "commission_rate": commission_rate,
+        "name": normalize_text(data["name"]),
+        "email": normalize_text(data["email"], upper=False),
+        "phone": data["phone"].strip(),
+        "id_number": data["id_number"].strip(),
+        "kra_pin": normalize_text(data.get("kra_pin")),
+        "address": normalize_text(data.get("address")),
+        "bank_name": normalize_text(data.get("bank_name")),
+        "bank_account": normalize_text(data.get("bank_account")),
+        "commission_rate": data.get("commission_rate"),
     }
 
 
@@ -99,11 +158,7 @@ async def update_landlord(
     if error:
         return None, error, None
 
-    landlord = (
-        await session.execute(
-            select(Landlords).where(Landlords.id == landlord_uuid)
-        )
-    ).scalar_one_or_none()
+    landlord = await session.get(Landlords, landlord_uuid) if landlord_uuid else None
 
     if not landlord:
         return None, f"Landlord `{landlord_id}` not found", None
@@ -117,10 +172,9 @@ async def update_landlord(
                     setattr(landlord, field, value)
 
         landlord.updated_by = current_user.id
-        landlord.updated_at = datetime.utcnow()
 
+        await bump_lookup_version(session)
         await session.commit()
-        await session.refresh(landlord)
 
         return f"Landlord `{landlord.name}` {action} successfully", None, landlord
 
@@ -133,56 +187,35 @@ async def update_landlord(
 async def get_landlords_data(
     session: AsyncSession,
     show_deleted: bool = False,
-):
-    filters = []
-    if not show_deleted:
-        filters.append(Landlords.status != "deleted")
-
-    stmt = (
-        select(
-            Landlords,
-            func.count(Apartments.id).label("apartments")
+) -> Tuple[list, Dict, str]:
+    """(landlords, stats, etag), cached in the lookup cache that landlord and apartment writes invalidate."""
+
+    async def load():
+        stmt, stats_stmt = (
+            (LANDLORDS_STMT, LANDLORD_STATS_STMT)
+            if show_deleted
+            else (ACTIVE_LANDLORDS_STMT, ACTIVE_LANDLORD_STATS_STMT)
         )
-        .join(
-            Apartments,
-            and_(
-                Apartments.landlord_id == Landlords.id,
-                Apartments.status != "deleted",
-            ),
-            isouter=True,
-        )
-        .where(*filters)
-        .group_by(Landlords.id)
-        .order_by(Landlords.name)
-    )
 
-    rows = (await session.execute(stmt)).all()
+        # Both on the request's session: only cache misses get here, so a second pooled connection isn't worth it
+        landlords = [dict(row) for row in (await session.execute(stmt)).mappings()]
 
-    landlords = [
-        {
-            "id": l.id,
-            "name": l.name,
-            "email": l.email,
-            "phone": l.phone,
-            "id_number": l.id_number,
-            "status": l.status,
-            "apartments": count or 0,
+        total, active, inactive, with_properties = (await session.execute(stats_stmt)).one()
+
+        stats = {
+            "total_landlords": total,
+            "active_landlords": active,
+            "inactive_landlords": inactive,
+            "with_properties": with_properties,
+            "without_properties": total - with_properties,
         }
-        for l, count in rows
-    ]
-
-    status_counts = Counter(l["status"] for l in landlords)
-    apt_counts = Counter("with" if l["apartments"] else "without" for l in landlords)
-
-    stats = {
-        "total_landlords": len(landlords),
-        "active_landlords": status_counts.get("active", 0),
-        "inactive_landlords": status_counts.get("inactive", 0),
-        "with_properties": apt_counts["with"],
-        "without_properties": apt_counts["without"],
-    }
 
-    return landlords, stats
+        # Hashed from the content, so every worker hands out the same tag for the same rows
+        etag = '"%s"' % hashlib.md5(orjson.dumps([landlords, stats])).hexdigest()
+
+        return landlords, stats, etag
+
+    return await get_cached(session, ("landlord_list", show_deleted), load)
 
 
 # ------------------------------------------------------------------
@@ -196,14 +229,14 @@ async def render_landlords(
     success: Optional[str] = None,
     errors: Optional[str] = None,
 ):
-    landlords, stats = await get_landlords_data(session, show_deleted)
+    # Rows are fetched client-side from /api/landlords; the page only needs the stats cards
+    _, stats, _ = await get_landlords_data(session, show_deleted)
 
-    return templates.TemplateResponse(
+    return stream_template(
         "landlords.html",
         {
             "request": request,
             "active": "landlords",
-            "landlords": landlords,
             "stats": stats,
             "success": success,
             "errors": errors,
@@ -237,11 +270,27 @@ async def render_edit_landlord(
     success: Optional[str] = None,
     errors: Optional[Dict] = None,
 ):
-    landlord = (
-        await session.execute(
-            select(Landlords).where(Landlords.id == landlord_id)
-        )
-    ).scalar_one_or_none()
+    # Only the columns the edit form shows; audit columns stay in the database.
+    # get() serves the row from the identity map when update_landlord just loaded it
+    landlord = await session.get(
+        Landlords,
+        landlord_id,
+        options=[
+            load_only(
+                Landlords.id,
+                Landlords.name,
+                Landlords.email,
+                Landlords.phone,
+                Landlords.id_number,
+                Landlords.status,
+                Landlords.kra_pin,
+                Landlords.address,
+                Landlords.bank_name,
+                Landlords.bank_account,
+                Landlords.commission_rate,
+            )
+        ],
+    ) if landlord_id else None
 
     if not landlord:
         errors = "Landlord not found"
@@ -270,7 +319,7 @@ async def fetch(
     show_deleted: bool = Query(False),
     toggle_status_id: Optional[str] = Query(None),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     success = errors = None
@@ -286,6 +335,27 @@ async def fetch(
     return await render_landlords(request, session, show_deleted, success, errors)
 
 
+@router.get("/api/landlords", response_class=ORJSONResponse)
+async def fetch_json(
+    request: Request,
+    current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
+    session: AsyncSession = Depends(get_session),
+    show_deleted: bool = Query(False),
+):
+    if type(current_user) is RedirectResponse:
+        return current_user
+
+    # Taken from the same call as the rows, so a concurrent rebuild can't pair them with a newer tag
+    landlords, stats, etag = await get_landlords_data(session, show_deleted)
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return ORJSONResponse({"landlords": landlords, "stats": stats}, headers=headers)
+
+
 @router.post("/landlords", response_class=HTMLResponse)
 async def post(
     request: Request,
@@ -295,7 +365,7 @@ async def post(
     restore_id: Optional[str] = Form(None),
     show_deleted: bool = Query(False),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     success = errors = None
@@ -317,7 +387,7 @@ async def new_landlord_form(
     request: Request,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     return await render_new_landlord(request)
@@ -327,54 +397,64 @@ async def new_landlord_form(
 async def create_landlord(
     request: Request,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
+    form: Annotated[LandlordForm, Form()],
     session: AsyncSession = Depends(get_session),
-    name: str = Form(...),
-    email: str = Form(...),
-    phone: str = Form(...),
-    id_number: str = Form(...),
-    kra_pin: Optional[str] = Form(None),
-    address: Optional[str] = Form(None),
-    bank_name: Optional[str] = Form(None),
-    bank_account: Optional[str] = Form(None),
-    commission_rate: Optional[float] = Form(None),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
     
     success = errors = ''
 
-    errors = validate_landlord_form(name, email, phone, id_number, commission_rate)
+    form_data = form.model_dump()
+
+    errors = validate_landlord_form(form.name, form.email, form.phone, form.id_number, form.commission_rate)
     if errors:
-        return await render_new_landlord(request, errors=errors, form_data=locals())
+        return await render_new_landlord(request, errors=errors, form_data=form_data)
 
-    now = datetime.utcnow()
+    data = normalize_landlord_data(form_data)
 
-    data = normalize_landlord_data(locals())
-    landlord = Landlords(
-        **data,
-        created_at=now,
-        created_by=current_user.id,
+    trial_package_id, trial_validity = await get_trial_package(session)
+
+    # The unique indexes on email/phone/id_number decide duplicates; when the landlord
+    # insert is skipped the CTE is empty and no license is written either. Both ids come
+    # from the gen_random_uuid() server defaults; the license reads the landlord's off RETURNING
+    new_landlord = (
+        insert(Landlords)
+        .values(
+            **data,
+            status="active",
+            created_by=current_user.id,
+        )
+        .on_conflict_do_nothing()
+        .returning(Landlords.id)
+        .cte("new_landlord")
     )
 
-    trial = (
-        await session.execute(
-            select(Packages).where(Packages.name == "TRIAL")
+    stmt = (
+        insert(Licenses)
+        .from_select(
+            ["key", "package_id", "landlord_id", "expires_at", "created_by"],
+            select(
+                literal(str(uuid.uuid4()).upper()),
+                literal(trial_package_id),
+                new_landlord.c.id,
+                func.now() + timedelta(days=trial_validity),
+                literal(current_user.id),
+            ),
         )
-    ).scalar_one()
-
-    license = Licenses(
-        key=str(uuid.uuid4()).upper(),
-        package_id=trial.id,
-        landlord_id=landlord.id,
-        expires_at=now + timedelta(days=trial.validity),
-        created_at=now,
-        created_by=current_user.id,
+        .returning(Licenses.landlord_id)
     )
 
     try:
-        session.add_all([landlord, license])
-        await session.commit()
-        success = f"Landlord `{landlord.name}` created successfully"
+        landlord_id = (await session.execute(stmt)).scalar_one_or_none()
+
+        if landlord_id is None:
+            await session.rollback()
+            errors = "A landlord with the same email, phone or ID number already exists"
+        else:
+            await bump_lookup_version(session)
+            await session.commit()
+            success = f"Landlord `{data['name']}` created successfully"
 
     except Exception as exc:
         logger.error(exc)
@@ -385,7 +465,7 @@ async def create_landlord(
         request,
         success=success,
         errors=errors,
-        form_data=locals(),
+        form_data=form_data,
     )
 
 
@@ -396,7 +476,7 @@ async def edit_landlord_form(
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session)
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
     
     landlord_id, errors = parse_uuid(id, "Invalid landlord ID")
@@ -414,21 +494,15 @@ async def edit_landlord(
     request: Request,
     id: str,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
+    form: Annotated[LandlordForm, Form()],
     session: AsyncSession = Depends(get_session),
-    name: str = Form(...),
-    email: str = Form(...),
-    phone: str = Form(...),
-    id_number: str = Form(...),
-    kra_pin: Optional[str] = Form(None),
-    address: Optional[str] = Form(None),
-    bank_name: Optional[str] = Form(None),
-    bank_account: Optional[str] = Form(None),
-    commission_rate: Optional[float] = Form(None),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
-    errors = validate_landlord_form(name, email, phone, id_number, commission_rate)
+    form_data = form.model_dump()
+
+    errors = validate_landlord_form(form.name, form.email, form.phone, form.id_number, form.commission_rate)
     if errors:
         landlord_id, _ = parse_uuid(id, "")
         return await render_edit_landlord(request, session, landlord_id, errors=errors)
@@ -437,10 +511,7 @@ async def edit_landlord(
         session,
         current_user,
         id,
-        normalize_landlord_data(
-            name, email, phone, id_number,
-            kra_pin, address, bank_name, bank_account, commission_rate
-        ),
+        normalize_landlord_data(form_data),
     )
 
     landlord_id, _ = parse_uuid(id, "")
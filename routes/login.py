@@ -1,32 +1,32 @@
-import logging, re
+import logging
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Form, Query, Request, Response, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy import select
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.templating import templates
+from core.templating import is_valid_phone, normalize_phone, templates
 from utils.database import get_session
 from utils.models import Users
 from utils.helpers import (
+    authenticate_user,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     get_current_user,
-    hash_password,
-    require_user
+    require_user,
+    user_cache,
 )
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-KENYAN_PHONE_REGEX = re.compile(r"^(?:\+254|0)[17]\d{8}$")
-
-
-def normalize_phone(phone: str) -> str:
-    """Convert phone to 2547XXXXXXXX format."""
-    return "254" + phone[-9:]
+# Fixed attributes, so skip http.cookies.SimpleCookie on every login; JWTs are cookie-safe
+ACCESS_TOKEN_COOKIE = (
+    "access_token={}; HttpOnly; Max-Age=%d; Path=/; SameSite=lax"
+    % (ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+)
 
 
 async def get_optional_user(
@@ -40,24 +40,28 @@ async def get_optional_user(
         return None
 
 
+class LoginForm(BaseModel):
+    phone: str
+    password: str
+
+
 def validate_login_form(phone: str, password: str) -> dict:
     errors = {}
 
     phone = phone.strip()
-    password = password.strip()
 
     if not phone:
-        errors = "Phone number is required"
-    elif not KENYAN_PHONE_REGEX.match(phone):
-        errors = "Invalid Kenyan phone format (e.g. +2547XXXXXXXX or 07XXXXXXXX)"
-        
-    if not password:
-        errors = "Password is required"
+        errors["phone"] = "Phone number is required"
+    elif not is_valid_phone(phone, allow_bare_254=False):
+        errors["phone"] = "Invalid Kenyan phone format (e.g. +2547XXXXXXXX or 07XXXXXXXX)"
+
+    if not password.strip():
+        errors["password"] = "Password is required"
 
     return errors
 
 
-def render_login(request: Request, errors: str = None):
+def render_login(request: Request, errors: dict | str | None = None):
     return templates.TemplateResponse(
         "login.html",
         {
@@ -86,49 +90,36 @@ async def get_login(
 @router.post("/login", response_class=HTMLResponse)
 async def post_login(
     request: Request,
-    phone: str = Form(...),
-    password: str = Form(...),
+    form: Annotated[LoginForm, Form()],
     session: AsyncSession = Depends(get_session),
     next: Annotated[str | None, Query()] = "/dashboard",
 ):
-    errors = validate_login_form(phone, password)
+    password = form.password
+
+    errors = validate_login_form(form.phone, password)
     if errors:
         return render_login(request, errors)
 
     try:
-        phone = normalize_phone(phone)
-
-        stmt = select(Users).where(Users.phone == phone)
-        result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
-
-        if not user:
-            return render_login(
-                request,
-                f"User with phone: `{phone}` does not exist",
-            )
+        user_id, error = await authenticate_user(
+            normalize_phone(form.phone),
+            password,
+            session,
+        )
 
-        if hash_password(password) != user.password:
-            return render_login(
-                request,
-                "Incorrect password",
-            )
+        if error:
+            return render_login(request, error)
 
         access_token = create_access_token(
-            data={"sub": str(user.id)}
+            data={"sub": str(user_id)}
         )
 
         redirect = RedirectResponse(
             url=next,
             status_code=status.HTTP_303_SEE_OTHER,
         )
-        redirect.set_cookie(
-            key="access_token",
-            value=access_token,
-            httponly=True,
-            secure=False,
-            samesite="lax",
-            max_age=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        redirect.raw_headers.append(
+            (b"set-cookie", ACCESS_TOKEN_COOKIE.format(access_token).encode("latin-1"))
         )
         return redirect
 
@@ -142,9 +133,12 @@ async def post_login(
 
 @router.get("/logout")
 async def logout(
+    request: Request,
     response: Response,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)]
 ):
+    user_cache.pop(request.cookies.get("access_token"), None)
+
     response.delete_cookie(
         key="access_token",
         httponly=True,
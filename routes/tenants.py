@@ -1,14 +1,15 @@
 import logging, uuid
-from datetime import datetime
 from typing import Annotated, Dict, Optional, Tuple
 
 from fastapi import APIRouter, Depends, Form, Query, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy import or_
+from pydantic import BaseModel, BeforeValidator, ConfigDict
+from sqlalchemy import or_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
 from sqlmodel import select
 
-from core.templating import PHONE_REGEX, READ_ONLY_FIELDS, templates
+from core.templating import READ_ONLY_FIELDS, is_valid_phone, normalize_phone, stream_template, templates
 from utils.database import get_session
 from utils.helpers import get_apartments, get_house_units, get_landlords, require_user
 from utils.models import Apartments, House_Units, Landlords, Tenants, Users
@@ -20,47 +21,64 @@ router = APIRouter()
 # ─────────────────────────────────────────────
 # Constants
 # ─────────────────────────────────────────────
-READ_ONLY_FIELDS = {"id", "created_at", "created_by"}
+# One JOIN that also populates tenant.house_unit.apartment.landlord, so the
+# template walks the relationships without per-row queries or dicts. Built
+# once at import; requests only append their filters
+TENANTS_STMT = (
+    select(Tenants)
+    .outerjoin(Tenants.house_unit)
+    .outerjoin(House_Units.apartment)
+    .outerjoin(Apartments.landlord)
+    .options(
+        contains_eager(Tenants.house_unit)
+        .contains_eager(House_Units.apartment)
+        .contains_eager(Apartments.landlord)
+    )
+    .order_by(Tenants.name)
+)
+
+# The filter forms submit "" for their "All" options; treat that as no filter.
+# Used as Annotated[OptionalUUID, Query()]: a Query(None) default drops the validator
+OptionalUUID = Annotated[Optional[uuid.UUID], BeforeValidator(lambda value: value or None)]
 
 
 # ─────────────────────────────────────────────
 # Helpers
 # ─────────────────────────────────────────────
-def parse_uuid(value: Optional[str], error_msg: str) -> Tuple[Optional[uuid.UUID], Optional[str]]:
-    if not value:
-        return None, None
-    try:
-        return uuid.UUID(value), None
-    except ValueError as exc:
-        logger.error(exc)
-        return None, error_msg
-
-
-def validate_tenant_form(
-    name: str,
-    phone: str,
-    id_number: str,
-    email: str,
-    next_of_kin_phone: Optional[str]
-) -> Dict[str, str]:
+class TenantForm(BaseModel):
+    """Tenant create/edit fields, parsed and whitespace-stripped in one pydantic-core pass."""
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    name: str
+    phone: str
+    id_number: str
+    email: str
+    next_of_kin: Optional[str] = None
+    next_of_kin_phone: Optional[str] = None
+    occupation: Optional[str] = None
+    employer: Optional[str] = None
+
+
+def validate_tenant_form(form: TenantForm) -> Dict[str, str]:
+    """Field errors for re-rendering the form; values arrive already stripped."""
     errors = {}
 
-    if not name.strip():
+    if not form.name:
         errors["name"] = "Name is required"
 
-    if "@" not in email or "." not in email.split("@")[-1]:
+    _, _, domain = form.email.partition("@")
+    if "." not in domain:
         errors["email"] = "Invalid email address"
 
-    if not id_number.strip():
+    if not form.id_number:
         errors["id_number"] = "ID Number is required"
         
-    if not phone.strip():
+    if not form.phone:
         errors["phone"] = "phone Number is required"
-
-    if phone and not PHONE_REGEX.match(phone):
+    elif not is_valid_phone(form.phone):
         errors["phone"] = "Invalid phone number format"
         
-    if next_of_kin_phone and not PHONE_REGEX.match(next_of_kin_phone):
+    if form.next_of_kin_phone and not is_valid_phone(form.next_of_kin_phone):
         errors["next_of_kin_phone"] = "Invalid next of kin phone number format"
 
     return errors
@@ -76,48 +94,47 @@ def normalize_tenant_data(
     occupation: Optional[str],
     employer: Optional[str]
 ) -> Dict:
+    # TenantForm has already stripped every value and validate_tenant_form has checked
+    # both phones, so only the shared canonical form is left to apply
     return {
-        "name": name.strip().upper(),
-        "email": email.strip().lower(),
-        "phone": "254" + phone.strip()[-9:],
-        "id_number": id_number.strip(),        
-        "next_of_kin": next_of_kin.strip().upper() if next_of_kin else None,
-        "next_of_kin_phone": "254" + next_of_kin_phone.strip()[-9:] if next_of_kin_phone else None,
-        "occupation": occupation.strip().upper() if occupation else None,
-        "employer": employer.strip().upper() if employer else None,
+        "name": name.upper(),
+        "email": email.lower(),
+        "phone": normalize_phone(phone),
+        "id_number": id_number,        
+        "next_of_kin": next_of_kin.upper() if next_of_kin else None,
+        "next_of_kin_phone": normalize_phone(next_of_kin_phone) if next_of_kin_phone else None,
+        "occupation": occupation.upper() if occupation else None,
+        "employer": employer.upper() if employer else None,
     }
     
 async def update_tenant(
     session: AsyncSession,
     current_user: Users,
-    tenant_id: str,
+    tenant_id: uuid.UUID,
     updates: Dict,
     action: str = "updated",
 ) -> Tuple[Optional[str], Optional[str], Optional[Tenants]]:
 
-    tenant_id_uuid, error = parse_uuid(tenant_id, "Invalid tenant ID")
-    if error:
-        return None, error, None
-
-    tenant = (
-        await session.execute(
-            select(Tenants).where(Tenants.id == tenant_id_uuid)
+    # One UPDATE ... RETURNING round trip instead of SELECT, mutate, flush
+    stmt = (
+        update(Tenants)
+        .where(Tenants.id == tenant_id)
+        .values(
+            **{field: value for field, value in updates.items() if field not in READ_ONLY_FIELDS},
+            updated_by=current_user.id,
         )
-    ).scalar_one_or_none()
-
-    if not tenant:
-        return None, f"Tenant `{tenant_id}` not found", None
+        .returning(Tenants)
+        .execution_options(synchronize_session=False)
+    )
 
     try:
-        for field, value in updates.items():
-            if field not in READ_ONLY_FIELDS:
-                setattr(tenant, field, value)
+        tenant = (await session.execute(stmt)).scalar_one_or_none()
 
-        tenant.updated_at = datetime.utcnow()
-        tenant.updated_by = current_user.id
+        if not tenant:
+            await session.rollback()
+            return None, f"Tenant `{tenant_id}` not found", None
 
         await session.commit()
-        await session.refresh(tenant)
 
         return f"Tenant `{tenant.name}` {action} successfully", None, tenant
 
@@ -156,42 +173,15 @@ async def get_tenants_data(
     if landlord_id:
         filters.append(Landlords.id == landlord_id)
     
-    stmt = (
-        select(
-            Tenants,
-            House_Units,
-            Apartments,
-            Landlords
-        )
-        .join(House_Units, Tenants.house_unit_id == House_Units.id, isouter=True)
-        .join(Apartments, House_Units.apartment_id == Apartments.id, isouter=True)
-        .join(Landlords, Apartments.landlord_id == Landlords.id, isouter=True)
-        .where(*filters)
-        .order_by(Tenants.name)
-    )
+    stmt = TENANTS_STMT.where(*filters)
     
-    rows = (await session.execute(stmt)).all()
+    # One after another on the request's session: the dropdowns are usually cache hits,
+    # and a page view shouldn't hold more than one pooled connection
+    tenants = (await session.execute(stmt)).unique().scalars().all()
+    apartments = await get_apartments(session, landlord_id)
+    landlords = await get_landlords(session)
 
-    tenants = [
-        {
-            "id": tenant.id,
-            "name": tenant.name,
-            "phone": tenant.phone,
-            "id_number": tenant.id_number,
-            "email": tenant.email,
-            "status": tenant.status,
-            "apartment": apartment,
-            "landlord": landlord,
-            "house_unit": house_unit,
-        }
-        for tenant, house_unit, apartment, landlord in rows
-    ]
-
-    return (
-        tenants,
-        await get_apartments(session, landlord_id),
-        await get_landlords(session),
-    )
+    return tenants, apartments, landlords
 
 
 # ─────────────────────────────────────────────
@@ -211,7 +201,8 @@ async def render_tenants(
         session, status, apartment_id, landlord_id, show_deleted
     )
 
-    return templates.TemplateResponse(
+    # Long tenant tables start reaching the browser before the last row is rendered
+    return stream_template(
         "tenants.html",
         {
             "request": request,
@@ -284,25 +275,24 @@ async def render_assign_tenant_house_unit(
     success: Optional[str] = None,
     errors: Optional[Dict] = None,
 ):
+    # All on the request's session; the lookups are usually cache hits
     tenant = (
-        await session.execute(
-            select(Tenants).where(Tenants.id == tenant_id)
-        )
+        await session.execute(select(Tenants).where(Tenants.id == tenant_id))
     ).scalar_one_or_none()
+    house_units = await get_house_units(session, apartment_id)
+    apartments = await get_apartments(session, landlord_id)
+    landlords = await get_landlords(session)
     
     if not tenant:
         errors = "Tenant not found"
     
-    house_units = await get_house_units(session, apartment_id)
-    house_unit = next((a for a in house_units if a.id == house_unit_id), None)  
+    house_unit = house_units.by_id.get(house_unit_id)
     
-    apartment_id = house_unit.apartment_id if house_unit else apartment_id
-    apartments = await get_apartments(session, landlord_id)
-    apartment = next((a for a in apartments if a.id == apartment_id), None) 
+    apartment_id = house_unit["apartment_id"] if house_unit else apartment_id
+    apartment = apartments.by_id.get(apartment_id)
     
-    landlord_id = apartment.landlord_id if apartment else landlord_id
-    landlords = await get_landlords(session)    
-    landlord = next((a for a in landlords if a.id == landlord_id), None)
+    landlord_id = apartment["landlord_id"] if apartment else landlord_id
+    landlord = landlords.by_id.get(landlord_id)
 
     return templates.TemplateResponse(
         "tenants-assign-house-unit.html",
@@ -373,25 +363,21 @@ async def fetch(
     request: Request,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session),
-    landlord_id: Optional[str] = Query(None),
-    apartment_id: Optional[str] = Query(None),
+    landlord_id: Annotated[OptionalUUID, Query()] = None,
+    apartment_id: Annotated[OptionalUUID, Query()] = None,
     status: Optional[str] = Query(None),
     show_deleted: bool = Query(False),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
-    landlord_uuid, err1 = parse_uuid(landlord_id, "Invalid landlord ID")
-    apartment_uuid, err2 = parse_uuid(apartment_id, "Invalid apartment ID")
-
     return await render_tenants(
         request,
         session,
         status,
-        apartment_uuid,
-        landlord_uuid,
+        apartment_id,
+        landlord_id,
         show_deleted,
-        errors=err1 or err2,
     )
 
 
@@ -400,23 +386,19 @@ async def post(
     request: Request,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session),
-    landlord_id: Optional[str] = Query(None),
-    apartment_id: Optional[str] = Query(None),
+    landlord_id: Annotated[OptionalUUID, Query()] = None,
+    apartment_id: Annotated[OptionalUUID, Query()] = None,
     status: Optional[str] = Query(None),
-    delete_id: Optional[str] = Form(None),
-    restore_id: Optional[str] = Form(None),
+    delete_id: Optional[uuid.UUID] = Form(None),
+    restore_id: Optional[uuid.UUID] = Form(None),
     show_deleted: bool = Query(False),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
-    landlord_uuid, err1 = parse_uuid(landlord_id, "Invalid landlord ID")
-    apartment_uuid, err2 = parse_uuid(apartment_id, "Invalid apartment ID")
+    success = errors = None
 
-    success = errors = err1 or err2
-
-    
-    if (delete_id or restore_id) and not errors:
+    if delete_id or restore_id:
         success, errors, _ = await update_tenant(
             session,
             current_user,
@@ -429,8 +411,8 @@ async def post(
         request,
         session,
         status,
-        apartment_uuid,
-        landlord_uuid,
+        apartment_id,
+        landlord_id,
         show_deleted,
         success,
         errors,
@@ -442,7 +424,7 @@ async def new_tenant_form(
     request: Request,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)]
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     return await render_new_tenant(request)
@@ -452,35 +434,26 @@ async def new_tenant_form(
 async def create_tenant(
     request: Request,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
+    form: Annotated[TenantForm, Form()],
     session: AsyncSession = Depends(get_session),
-    name: str = Form(...),    
-    phone: str = Form(...),
-    id_number: str = Form(...),
-    email: str = Form(...),
-    next_of_kin: Optional[str] = Form(None),
-    next_of_kin_phone: Optional[str] = Form(None),
-    occupation: Optional[str] = Form(None),
-    employer: Optional[str] = Form(None),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
     success = errors = ''
+
+    form_data = form.model_dump()
     
-    errors = validate_tenant_form(name, phone, id_number, email, next_of_kin_phone)
+    errors = validate_tenant_form(form)
     if errors:
         return await render_new_tenant(
             request, 
             errors=errors, 
-            form_data=locals()
+            form_data=form_data
         )
         
     tenant = Tenants(
-        **normalize_tenant_data(
-            name, phone, id_number, email,
-            next_of_kin, next_of_kin_phone, occupation, employer
-        ),
-        created_at=datetime.utcnow(),
+        **normalize_tenant_data(**form_data),
         created_by=current_user.id,
     )
     
@@ -498,71 +471,55 @@ async def create_tenant(
         request,
         success=success,
         errors=errors,
-        form_data=locals(),
+        form_data=form_data,
     )
     
 
 @router.get("/tenants/edit/{id}", response_class=HTMLResponse)
 async def edit_tenant_form(
     request: Request,
-    id: str,
+    id: uuid.UUID,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
-    
-    tenant_id, errors = parse_uuid(id, "Invalid tenant ID")
 
-    return await render_edit_tenant(
-        request, 
-        session, 
-        tenant_id, 
-        errors=errors
-    )
+    return await render_edit_tenant(request, session, id)
     
 
 @router.post("/tenants/edit/{id}", response_class=HTMLResponse)
 async def edit_tenant(
     request: Request,
-    id: str,
+    id: uuid.UUID,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
+    form: Annotated[TenantForm, Form()],
     session: AsyncSession = Depends(get_session),
-    name: str = Form(...),    
-    phone: str = Form(...),
-    id_number: str = Form(...),
-    email: str = Form(...),
-    next_of_kin: Optional[str] = Form(None),
-    next_of_kin_phone: Optional[str] = Form(None),
-    occupation: Optional[str] = Form(None),
-    employer: Optional[str] = Form(None),
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
 
-    errors = validate_tenant_form(name, phone, id_number, email, next_of_kin_phone)
+    form_data = form.model_dump()
+
+    errors = validate_tenant_form(form)
     if errors:
         return await render_new_tenant(
             request, 
             errors=errors, 
-            form_data=locals()
+            form_data=form_data
         )
         
     success, errors, _ = await update_tenant(
         session,
         current_user,
         id,
-        normalize_tenant_data(
-            name, phone, id_number, email,
-            next_of_kin, next_of_kin_phone, occupation, employer
-        )
+        normalize_tenant_data(**form_data)
     )
 
-    tenant_id, _ = parse_uuid(id, "")
     return await render_edit_tenant(
         request, 
         session, 
-        tenant_id, 
+        id, 
         success=success, 
         errors=errors
     )
@@ -571,45 +528,37 @@ async def edit_tenant(
 @router.get("/tenants/assign-house-unit/{id}", response_class=HTMLResponse)
 async def assign_tenant_house_unit_form(
     request: Request,
-    id: str,
+    id: uuid.UUID,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session),      
-    landlord_id: Optional[str] = Query(None),
-    apartment_id: Optional[str] = Query(None),
-    house_unit_id: Optional[str] = Query(None),
+    landlord_id: Annotated[OptionalUUID, Query()] = None,
+    apartment_id: Annotated[OptionalUUID, Query()] = None,
+    house_unit_id: Annotated[OptionalUUID, Query()] = None,
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
-    
-    tenant_id, errors = parse_uuid(id, "Invalid tenant ID")
-    landlord_id, errors = parse_uuid(landlord_id, "Invalid tenant ID")
-    apartment_id, errors = parse_uuid(apartment_id, "Invalid tenant ID")
-    house_unit_id, errors = parse_uuid(house_unit_id, "Invalid tenant ID")
 
     return await render_assign_tenant_house_unit(
         request, 
         session, 
-        tenant_id, 
+        id, 
         landlord_id,
         apartment_id,
         house_unit_id,
-        errors=errors
     )
     
 
 @router.post("/tenants/assign-house-unit/{id}", response_class=HTMLResponse)
 async def assign_tenant_house_unit(
     request: Request,
-    id: str,
+    id: uuid.UUID,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session),
-    house_unit_id: str = Form(...),  
+    house_unit_id: uuid.UUID = Form(...),  
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
     
-    house_unit_id, errors = parse_uuid(house_unit_id, "")
-    
     success, errors, _ = await update_tenant(
             session,
             current_user,
@@ -634,19 +583,12 @@ async def assign_tenant_house_unit(
 @router.get("/tenants/{id}", response_class=HTMLResponse)
 async def tenant_details(
     request: Request,
-    id: str,
+    id: uuid.UUID,
     current_user: Annotated[Users | RedirectResponse, Depends(require_user)],
     session: AsyncSession = Depends(get_session)
 ):
-    if isinstance(current_user, RedirectResponse):
+    if type(current_user) is RedirectResponse:
         return current_user
-    
-    tenant_id, errors = parse_uuid(id, "Invalid tenant ID")
 
-    return await render_tenant_details(
-        request, 
-        session, 
-        tenant_id, 
-        errors=errors
-    )
+    return await render_tenant_details(request, session, id)
     
@@ -0,0 +1,89 @@
+import hashlib, os, random, uuid
+
+import pytest
+
+# The app binds its engine at import, so point it at the test database first.
+# Needs a Postgres the tests may create tables in; skipped when unset
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+
+
+def random_digits(count: int) -> str:
+    return "".join(random.choices("0123456789", k=count))
+
+
+@pytest.fixture(scope="session")
+def client():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def landlord_id(client):
+    """A fresh landlord with an admin user, logged in on `client`."""
+    from sqlalchemy import text
+    from utils.database import engine
+
+    landlord_id, level_id, user_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    subscriber = "7" + random_digits(8)
+
+    async def seed():
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("INSERT INTO user_levels (id, name, level, created_by) VALUES (:id, 'admin', 0, :id)"),
+                {"id": level_id},
+            )
+            await conn.execute(
+                text(
+                    "INSERT INTO landlords (id, name, email, phone, id_number, status, created_by) "
+                    "VALUES (:id, 'TEST LANDLORD', :email, :phone, :id_number, 'active', :id)"
+                ),
+                {
+                    "id": landlord_id,
+                    "email": f"{landlord_id.hex}@example.com",
+                    "phone": "0" + random_digits(9),
+                    "id_number": random_digits(10),
+                },
+            )
+            await conn.execute(
+                text(
+                    "INSERT INTO users (id, name, phone, user_level_id, landlord_id, password, status, created_by) "
+                    "VALUES (:id, 'admin', :phone, :level_id, :landlord_id, :password, 'active', :id)"
+                ),
+                {
+                    "id": user_id,
+                    "phone": "254" + subscriber,
+                    "level_id": level_id,
+                    "landlord_id": landlord_id,
+                    "password": hashlib.sha256(b"password").hexdigest(),
+                },
+            )
+            # Landlord creation issues a license on the TRIAL package
+            await conn.execute(
+                text(
+                    "INSERT INTO packages (name, amount, pay, validity, color, created_by) "
+                    "SELECT 'TRIAL', 0, 0, 14, 'primary', :id "
+                    "WHERE NOT EXISTS (SELECT 1 FROM packages WHERE name = 'TRIAL')"
+                ),
+                {"id": user_id},
+            )
+
+    client.portal.call(seed)
+
+    response = client.post(
+        "/login",
+        data={"phone": "0" + subscriber, "password": "password"},
+        follow_redirects=False,
+    )
+    assert response.status_code == 303
+
+    return landlord_id
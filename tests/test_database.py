@@ -0,0 +1,103 @@
+from datetime import date
+
+
+def test_ensure_partitions_replaces_empty_default(client):
+    from sqlalchemy import text
+    from utils.database import engine, ensure_partitions
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE IF NOT EXISTS bills_default PARTITION OF bills DEFAULT"))
+
+        await ensure_partitions()
+
+        async with engine.connect() as conn:
+            return (
+                await conn.execute(
+                    text("SELECT to_regclass('bills_default'), to_regclass(:current)"),
+                    {"current": f"bills_{date.today():%Y_%m}"},
+                )
+            ).one()
+
+    default, current = client.portal.call(run)
+
+    assert default is None
+    assert current is not None
+
+
+def test_init_db_upgrades_existing_tables(client):
+    from sqlalchemy import text
+    from utils.database import engine, init_db
+
+    # What a database created before these models looked like
+    async def downgrade():
+        async with engine.begin() as conn:
+            await conn.execute(text("ALTER TABLE landlords DROP COLUMN phone_e164"))
+            await conn.execute(text("ALTER TABLE landlords DROP CONSTRAINT ck_landlords_commission_rate"))
+            await conn.execute(text("ALTER TABLE landlords ALTER COLUMN commission_rate TYPE double precision"))
+            await conn.execute(text("ALTER TABLE landlords ALTER COLUMN id DROP DEFAULT"))
+            await conn.execute(text("DROP INDEX ix_landlords_active_name"))
+
+    async def upgrade():
+        await init_db()
+        async with engine.connect() as conn:
+            return (
+                await conn.execute(
+                    text(
+                        "SELECT "
+                        "(SELECT is_generated FROM information_schema.columns "
+                        " WHERE table_name = 'landlords' AND column_name = 'phone_e164'), "
+                        "(SELECT data_type FROM information_schema.columns "
+                        " WHERE table_name = 'landlords' AND column_name = 'commission_rate'), "
+                        "(SELECT column_default FROM information_schema.columns "
+                        " WHERE table_name = 'landlords' AND column_name = 'id'), "
+                        "to_regclass('ix_landlords_phone_e164'), "
+                        "to_regclass('ix_landlords_active_name'), "
+                        "(SELECT count(*) FROM pg_constraint WHERE conname = 'ck_landlords_commission_rate')"
+                    )
+                )
+            ).one()
+
+    client.portal.call(downgrade)
+    generated, commission_type, id_default, phone_index, name_index, checks = client.portal.call(upgrade)
+
+    assert generated == "ALWAYS"
+    assert commission_type == "numeric"
+    assert id_default == "gen_random_uuid()"
+    assert phone_index is not None and name_index is not None
+    assert checks == 1
+
+
+def test_bulk_insert_fills_model_defaults(client):
+    import uuid
+    from sqlalchemy import text
+    from utils.database import async_session, bulk_insert
+    from utils.models import House_Types
+
+    creator = uuid.uuid4()
+    names = [f"bulk-{uuid.uuid4().hex[:8]}" for _ in range(2)]
+
+    async def run():
+        async with async_session() as session:
+            # Only the first row sets status; the second relies on the model default
+            await bulk_insert(session, House_Types, [
+                {"name": names[0], "status": "inactive", "created_by": creator},
+                {"name": names[1], "created_by": creator},
+            ])
+            # Raw SQL leaves it out entirely and gets the server default
+            await session.execute(
+                text("INSERT INTO house_types (name, created_by) VALUES ('raw', :creator)"),
+                {"creator": creator},
+            )
+            await session.commit()
+
+            return dict(
+                (
+                    await session.execute(
+                        text("SELECT name, status FROM house_types WHERE created_by = :creator"),
+                        {"creator": creator},
+                    )
+                ).all()
+            )
+
+    assert client.portal.call(run) == {names[0]: "inactive", names[1]: "active", "raw": "active"}
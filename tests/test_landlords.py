@@ -0,0 +1,103 @@
+import uuid
+
+def test_api_landlords_serializes_rows(client, landlord_id):
+    response = client.get("/api/landlords")
+
+    assert response.status_code == 200
+    assert str(landlord_id) in [row["id"] for row in response.json()["landlords"]]
+
+
+def test_api_landlords_honours_etag(client, landlord_id):
+    etag = client.get("/api/landlords").headers["etag"]
+
+    response = client.get("/api/landlords", headers={"if-none-match": etag})
+
+    assert response.status_code == 304
+
+
+def test_api_landlords_reflects_writes(client, landlord_id):
+    before = client.get("/api/landlords").headers["etag"]
+
+    client.get("/landlords", params={"toggle_status_id": str(landlord_id)})
+    response = client.get("/api/landlords")
+
+    assert response.headers["etag"] != before
+    row = next(row for row in response.json()["landlords"] if row["id"] == str(landlord_id))
+    assert row["status"] == "inactive"
+
+
+def test_create_landlord_with_blank_commission_rate(client, landlord_id):
+    suffix = uuid.uuid4().hex[:8]
+    form = {
+        "name": f"landlord {suffix}",
+        "email": f"{suffix}@example.com",
+        "phone": "0712" + str(int(suffix, 16))[-6:].rjust(6, "0"),
+        "id_number": suffix,
+        "kra_pin": "",
+        "address": "",
+        "bank_name": "",
+        "bank_account": "",
+        "commission_rate": "",
+    }
+
+    response = client.post("/landlords/new", data=form)
+
+    assert response.status_code == 200
+    assert "created successfully" in response.text
+
+
+def test_create_landlord_issues_trial_license(client, landlord_id):
+    from sqlalchemy import text
+    from utils.database import engine
+
+    suffix = uuid.uuid4().hex[:8]
+    form = {
+        "name": f"licensed {suffix}",
+        "email": f"licensed-{suffix}@example.com",
+        "phone": "0713" + str(int(suffix, 16))[-6:].rjust(6, "0"),
+        "id_number": f"L{suffix}",
+        "commission_rate": "10",
+    }
+
+    assert "created successfully" in client.post("/landlords/new", data=form).text
+
+    async def license_ids():
+        async with engine.connect() as conn:
+            return (
+                await conn.execute(
+                    text(
+                        "SELECT landlords.id, licenses.id FROM landlords "
+                        "JOIN licenses ON licenses.landlord_id = landlords.id "
+                        "WHERE landlords.email = :email"
+                    ),
+                    {"email": form["email"]},
+                )
+            ).one()
+
+    landlord, license = client.portal.call(license_ids)
+    assert landlord is not None and license is not None
+
+
+def test_api_landlords_sees_writes_from_other_workers(client, landlord_id):
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from utils.database import engine
+    from utils.helpers import bump_lookup_version
+
+    client.get("/api/landlords")
+
+    # Another worker's write: it commits the change and the version bump together,
+    # and never touches this process's cache
+    async def write_elsewhere():
+        async with AsyncSession(engine) as session:
+            await session.execute(
+                text("UPDATE landlords SET name = 'RENAMED ELSEWHERE' WHERE id = :id"),
+                {"id": landlord_id},
+            )
+            await bump_lookup_version(session)
+            await session.commit()
+
+    client.portal.call(write_elsewhere)
+
+    rows = client.get("/api/landlords").json()["landlords"]
+    assert next(row for row in rows if row["id"] == str(landlord_id))["name"] == "RENAMED ELSEWHERE"
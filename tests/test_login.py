@@ -0,0 +1,25 @@
+from conftest import random_digits
+
+
+def test_login_rejects_unknown_phone(client):
+    response = client.post("/login", data={"phone": "07" + random_digits(8), "password": "password"})
+
+    assert response.status_code == 200
+    assert "does not exist" in response.text
+
+
+def test_login_upgrades_legacy_hash(client, landlord_id):
+    from sqlalchemy import text
+    from utils.database import engine
+
+    async def stored_hash():
+        async with engine.connect() as conn:
+            return (
+                await conn.execute(
+                    text("SELECT password FROM users WHERE landlord_id = :id"),
+                    {"id": landlord_id},
+                )
+            ).scalar_one()
+
+    # The fixture seeds an unsalted SHA-256 hash and logs in with it
+    assert client.portal.call(stored_hash).startswith("$argon2")
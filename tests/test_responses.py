@@ -0,0 +1,21 @@
+import uuid
+from decimal import Decimal
+
+import orjson
+import pytest
+from asyncpg.pgproto.pgproto import UUID as AsyncpgUUID
+
+from core.responses import ORJSONResponse
+
+
+def test_renders_decimal_and_asyncpg_uuid():
+    value = uuid.uuid4()
+
+    body = ORJSONResponse({"id": AsyncpgUUID(value.bytes), "amount": Decimal("1250.50")}).body
+
+    assert orjson.loads(body) == {"id": str(value), "amount": "1250.50"}
+
+
+def test_still_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        ORJSONResponse({"value": object()})
@@ -1,19 +1,48 @@
 from sqlmodel import SQLModel
+from sqlalchemy import CheckConstraint, DateTime, Float, Numeric, event, inspect, insert, literal, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+import asyncio
+import logging
 import os
+from datetime import date
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Add connect_args to disable prepared statement cache
+# Prepared statements must stay off behind PgBouncer in transaction mode
+# (e.g. the Supabase pooler); raise this when connecting to Postgres directly
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 0))
+
+# Let an external PgBouncer do the pooling when asked to, otherwise keep a
+# bounded local pool that drops dead connections after a failover
+if os.getenv("DB_NULL_POOL", "false").lower() == "true":
+    pool_options = {"poolclass": NullPool}
+else:
+    pool_options = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 20)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,
     future=True,
-    connect_args={"statement_cache_size": 0} 
+    query_cache_size=1200,
+    connect_args={
+        "statement_cache_size": STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": STATEMENT_CACHE_SIZE,
+    },
+    **pool_options,
 )
 
 async_session = sessionmaker(
@@ -23,7 +52,187 @@ async_session = sessionmaker(
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+
+def apply_schema_step(conn, statement: str):
+    # Own savepoint, so one step that existing data rejects (say, a unique index over
+    # duplicates) is logged and skipped instead of aborting start-up
+    try:
+        with conn.begin_nested():
+            conn.execute(text(statement))
+        logger.info("Schema upgrade: %s", statement)
+    except DBAPIError as exc:
+        logger.warning("Schema upgrade step skipped: %s (%s)", statement, exc.orig)
+
+def upgrade_schema(conn):
+    """Bring tables created by an older version up to utils.models.
+
+    create_all only creates missing tables and there are no migrations, so this adds
+    what it skips on existing ones: new columns, server defaults, timezone-aware
+    timestamps, NUMERIC money columns, indexes, CHECK constraints (NOT VALID, so old
+    rows aren't rescanned) and storage options. Every step checks the catalog first,
+    so on an up-to-date database it only reads. Tables that predate partitioning stay
+    unpartitioned (see ensure_partitions); indexes the models dropped are left in place.
+    """
+    # Imported here: utils.models builds on SQLModel.metadata, not on this module
+    from utils.models import UPDATE_HEAVY_STORAGE
+
+    dialect = conn.dialect
+    inspector = inspect(conn)
+
+    def sql(clause) -> str:
+        # Plain-string server defaults are literals, not SQL
+        if isinstance(clause, str):
+            clause = literal(clause)
+        return str(clause.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+    for table in SQLModel.metadata.sorted_tables:
+        name = table.name
+        existing = {column["name"]: column for column in inspector.get_columns(name)}
+
+        for column in table.columns:
+            current = existing.get(column.name)
+
+            if current is None:
+                definition = f"{column.name} {column.type.compile(dialect)}"
+                # Without a server default existing rows have nothing to fill a NOT NULL
+                # column with, so it is added nullable; backfill before tightening it
+                if column.computed is not None:
+                    definition += f" GENERATED ALWAYS AS ({column.computed.sqltext}) STORED"
+                elif column.server_default is not None:
+                    definition += f" DEFAULT {sql(column.server_default.arg)}"
+                    if not column.nullable:
+                        definition += " NOT NULL"
+                for foreign_key in column.foreign_keys:
+                    definition += f" REFERENCES {foreign_key.column.table.name} ({foreign_key.column.name})"
+                apply_schema_step(conn, f"ALTER TABLE {name} ADD COLUMN {definition}")
+                continue
+
+            # Naive timestamps were written with datetime.utcnow
+            if isinstance(column.type, DateTime) and column.type.timezone and not current["type"].timezone:
+                apply_schema_step(
+                    conn,
+                    f"ALTER TABLE {name} ALTER COLUMN {column.name} "
+                    f"TYPE TIMESTAMP WITH TIME ZONE USING {column.name} AT TIME ZONE 'UTC'",
+                )
+
+            if (
+                isinstance(column.type, Numeric) and not isinstance(column.type, Float)
+                and isinstance(current["type"], Float)
+            ):
+                numeric = column.type.compile(dialect)
+                apply_schema_step(
+                    conn,
+                    f"ALTER TABLE {name} ALTER COLUMN {column.name} "
+                    f"TYPE {numeric} USING {column.name}::{numeric}",
+                )
+
+            if column.computed is None and column.server_default is not None and current["default"] is None:
+                apply_schema_step(
+                    conn,
+                    f"ALTER TABLE {name} ALTER COLUMN {column.name} SET DEFAULT {sql(column.server_default.arg)}",
+                )
+
+        index_names = {index["name"] for index in inspector.get_indexes(name)}
+        for index in table.indexes:
+            if index.name not in index_names:
+                apply_schema_step(conn, sql(CreateIndex(index)))
+
+        check_names = {check["name"] for check in inspector.get_check_constraints(name)}
+        for constraint in table.constraints:
+            if isinstance(constraint, CheckConstraint) and constraint.name not in check_names:
+                apply_schema_step(
+                    conn,
+                    f"ALTER TABLE {name} ADD CONSTRAINT {constraint.name} "
+                    f"CHECK ({constraint.sqltext}) NOT VALID",
+                )
+
+        if event.contains(table, "after_create", UPDATE_HEAVY_STORAGE):
+            options = conn.execute(
+                text("SELECT reloptions FROM pg_class WHERE oid = to_regclass(:table)"),
+                {"table": name},
+            ).scalar() or []
+            if "fillfactor=90" not in options:
+                apply_schema_step(conn, sql(UPDATE_HEAVY_STORAGE.against(table)))
+
+# Range-partitioned on created_at by month (see utils.models)
+PARTITIONED_TABLES = ("bills", "payments")
+
+# How often a running process tops up the months ahead, in seconds
+PARTITION_CHECK_INTERVAL = 24 * 60 * 60
+
+async def ensure_partitions(months_ahead: int = 3):
+    """Create the current and next `months_ahead` monthly partitions.
+
+    Safe to run repeatedly; tables that predate partitioning are left alone. There is
+    no DEFAULT partition: once it held a row for a month, that month's partition could
+    no longer be created, so an empty one left by earlier versions is dropped.
+    """
+    first = date.today().replace(day=1)
+    months = [
+        date(first.year + (first.month - 1 + offset) // 12, (first.month - 1 + offset) % 12 + 1, 1)
+        for offset in range(months_ahead + 2)
+    ]
+
+    async with engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            relkind = (
+                await conn.execute(
+                    text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:table)"),
+                    {"table": table},
+                )
+            ).scalar()
+            if relkind != "p":
+                continue
+
+            default = f"{table}_default"
+            if (await conn.execute(text("SELECT to_regclass(:table)"), {"table": default})).scalar():
+                if (await conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default})"))).scalar():
+                    logger.warning(
+                        "%s holds rows; move them into monthly partitions and drop it", default
+                    )
+                else:
+                    await conn.execute(text(f"DROP TABLE {default}"))
+
+            for start, end in zip(months, months[1:]):
+                await conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {table}_{start:%Y_%m} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{start}') TO ('{end}')"
+                ))
+
+async def maintain_partitions(interval: int = PARTITION_CHECK_INTERVAL):
+    """Re-run ensure_partitions every `interval` seconds so a long-running process never runs out of months."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await ensure_partitions()
+        except Exception as exc:
+            logger.error(exc)
 
 async def get_session() -> AsyncSession:
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def bulk_insert(
+    session: AsyncSession,
+    model: type[SQLModel],
+    rows: list[dict],
+    chunk_size: int = 1000,
+) -> None:
+    """Core multi-row INSERTs for seeds and imports; skips the ORM unit of work.
+
+    Core only applies the model's Python-side defaults when every row in a chunk
+    leaves the column out, so each scalar one (status, deposits, ...) is filled into
+    the rows that omit it. Columns with only a server default (ids, created_at) may
+    be omitted as well, but by every row or none: a chunk is one statement with one
+    column list. The caller commits.
+    """
+    table = model.__table__
+    defaults = {
+        column.key: column.default.arg
+        for column in table.columns
+        if column.default is not None and column.default.is_scalar
+    }
+    rows = [{**defaults, **row} for row in rows]
+    for start in range(0, len(rows), chunk_size):
+        await session.execute(insert(table), rows[start:start + chunk_size])
@@ -1,68 +1,145 @@
 
+import asyncio
 import hashlib
+import hmac
 import os
-from datetime import datetime, timedelta
+import time
+from datetime import timedelta
 from typing import Optional
 import uuid
 
+from argon2 import PasswordHasher
+from cachetools import TTLCache
+from argon2.exceptions import InvalidHashError, VerificationError
 from fastapi.responses import RedirectResponse
 import jwt
 from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
 from sqlmodel import select
 
 from utils.database import get_session
-from utils.models import Apartments, House_Units, Landlords, Users
+from utils.models import Apartments, Cache_Versions, House_Units, Landlords, Packages, Users
 
 
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+password_hasher = PasswordHasher()
+
 def hash_password(password):
-    password_bytes = password.encode('utf-8')
-    hash_object = hashlib.sha256(password_bytes)
-    return hash_object.hexdigest()
+    return password_hasher.hash(password)
+
+def verify_password(password: str, stored_hash: str) -> bool:
+    """Constant-time check against an argon2 hash, or a legacy unsalted SHA-256 hex digest."""
+    if stored_hash.startswith("$argon2"):
+        try:
+            return password_hasher.verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    legacy_hash = hashlib.sha256(password.encode('utf-8')).hexdigest()
+    return hmac.compare_digest(legacy_hash, stored_hash)
+
+def password_needs_rehash(stored_hash: str) -> bool:
+    if not stored_hash.startswith("$argon2"):
+        return True
+    return password_hasher.check_needs_rehash(stored_hash)
     
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
-    expire = datetime.now() + (expires_delta or timedelta(minutes=15))
-    to_encode.update({"exp": expire})
+    # Epoch seconds: no datetime allocation, and no local-time offset leaking into exp
+    expires_in = (expires_delta or timedelta(minutes=15)).total_seconds()
+    to_encode.update({"exp": int(time.time() + expires_in)})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-async def authenticate_user(phone: str, password: str, session: AsyncSession) -> Users | None:
-    statement = select(Users).where(Users.phone == phone)
-    result = await session.execute(statement)
-    user = result.scalar_one_or_none()
-    if user and user.password == hash_password(password):
-        return user
-    return None
+# Same SQL text for every login, so it stays a single entry in SQLAlchemy's compiled
+# cache and in asyncpg's prepared statement cache when DB_STATEMENT_CACHE_SIZE is set.
+# Served by the unique index on users.phone
+USER_CREDENTIALS_STMT = select(Users.id, Users.password).where(Users.phone == bindparam("phone"))
+
+# Only the credentials query above reads the hash; a loaded Users (including the
+# ones kept in user_cache) never carries it, and touching it raises instead of lazy-loading
+WITHOUT_PASSWORD = defer(Users.password, raiseload=True)
+
+async def authenticate_user(
+    phone: str,
+    password: str,
+    session: AsyncSession,
+) -> tuple[Optional[uuid.UUID], Optional[str]]:
+    """(user id, error) for a login attempt; upgrades a legacy or outdated hash on success."""
+    # Salted hashes can't be matched in SQL, so fetch just the id and hash;
+    # a failed attempt never builds a Users object
+    credentials = (
+        await session.execute(USER_CREDENTIALS_STMT, {"phone": phone})
+    ).one_or_none()
+
+    if not credentials:
+        return None, f"User with phone: `{phone}` does not exist"
+
+    # argon2 is deliberately slow; keep it off the event loop
+    if not await run_in_threadpool(verify_password, password, credentials.password):
+        return None, "Incorrect password"
+
+    # Upgrade legacy SHA-256 (or outdated argon2 parameters) on successful login
+    if password_needs_rehash(credentials.password):
+        await session.execute(
+            update(Users)
+            .where(Users.id == credentials.id)
+            .values(password=await run_in_threadpool(hash_password, password))
+        )
+        await session.commit()
 
+    return credentials.id, None
+
+
+# token -> (exp, user): a returning session skips both the JWT signature check and
+# the users lookup for a short while. Entries are expunged from the session that
+# loaded them, and a deactivated user keeps working until the entry ages out
+user_cache: TTLCache = TTLCache(maxsize=1024, ttl=30)
 
 async def get_current_user(
     request: Request,
     session: AsyncSession = Depends(get_session),
 ) -> Users:
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return user
+
     token = request.cookies.get("access_token")
 
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-    except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    cached = user_cache.get(token)
+    if cached and cached[0] > time.time():
+        user = cached[1]
+    else:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user_id = payload.get("sub")
+        except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
-    user = (
-        await session.execute(
-            select(Users).where(Users.id == user_id)
-        )
-    ).scalar_one_or_none()
+        user = (
+            await session.execute(
+                select(Users).options(WITHOUT_PASSWORD).where(Users.id == user_id)
+            )
+        ).scalar_one_or_none()
 
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+        # Shared across requests, so it must not belong to this one's session:
+        # a rollback here would otherwise expire it for every later request
+        session.expunge(user)
+        user_cache[token] = (payload["exp"], user)
 
+    request.state.user = user
     return user
 
 
@@ -79,16 +156,102 @@ async def require_user(
         )
         
 
+# Parameterless, so built once instead of on every page that lists landlords.
+# Only the columns the dropdowns and the assign-house-unit summary show
+LANDLORDS_STMT = (
+    select(Landlords.id, Landlords.name, Landlords.phone)
+    .where(Landlords.status != "deleted")
+    .order_by(Landlords.name)
+)
+APARTMENTS_STMT = (
+    select(Apartments.id, Apartments.name, Apartments.location, Apartments.landlord_id)
+    .where(Apartments.status != "deleted")
+    .order_by(Apartments.name)
+)
+HOUSE_UNITS_STMT = (
+    select(
+        House_Units.id,
+        House_Units.name,
+        House_Units.apartment_id,
+        House_Units.rent,
+        House_Units.rent_deposit,
+        House_Units.water_deposit,
+        House_Units.electricity_deposit,
+        House_Units.other_deposits,
+    )
+    .where(House_Units.status != "deleted")
+    .order_by(House_Units.name)
+)
+
+# The landlord/apartment/house unit dropdowns (and the landlord list page) are small
+# and read on almost every page. Rows are kept as plain column dicts so no ORM instance
+# outlives its session. Each entry remembers the shared lookups version it was built at;
+# routes that write those tables call bump_lookup_version() before committing, which
+# invalidates every worker's copy at once
+lookup_cache: TTLCache = TTLCache(maxsize=256, ttl=60)
+
+LOOKUP_VERSION_STMT = select(Cache_Versions.version).where(Cache_Versions.name == "lookups")
+BUMP_LOOKUP_VERSION_STMT = (
+    pg_insert(Cache_Versions)
+    .values(name="lookups", version=1)
+    .on_conflict_do_update(
+        index_elements=[Cache_Versions.name],
+        set_={"version": Cache_Versions.version + 1},
+    )
+)
+
+class LookupRows(list):
+    """Cached lookup rows plus an id -> row index, built once per cache fill."""
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.by_id = {row["id"]: row for row in self}
+
+class CachedLookup:
+    """One lookup_cache slot; its fill lock is evicted along with it."""
+    __slots__ = ("version", "value", "lock")
+
+    def __init__(self):
+        self.version = None
+        self.value = None
+        self.lock = asyncio.Lock()
+
+async def bump_lookup_version(session: AsyncSession):
+    # Runs in the caller's transaction: the new version and the write commit (or roll back) together
+    await session.execute(BUMP_LOOKUP_VERSION_STMT)
+
+async def get_cached(session: AsyncSession, key: tuple, load):
+    """`load()`'s result for `key`, rebuilt once per key whenever the lookups version moves."""
+    # A primary-key read; anything loaded after it is at least as new as `version`
+    version = (await session.execute(LOOKUP_VERSION_STMT)).scalar() or 0
+
+    entry = lookup_cache.get(key)
+    if entry is None:
+        entry = lookup_cache[key] = CachedLookup()
+
+    if entry.version != version:
+        async with entry.lock:
+            if entry.version != version:
+                entry.value = await load()
+                entry.version = version
+
+    return entry.value
+
+async def get_cached_rows(
+    session: AsyncSession,
+    key: tuple,
+    stmt,
+) -> LookupRows:
+    async def load():
+        result = await session.execute(stmt)
+        return LookupRows(dict(row) for row in result.mappings())
+
+    return await get_cached(session, key, load)
+
+
 async def get_landlords(
     session: AsyncSession,
 ) -> list[dict]:
-    stmt = (
-        select(Landlords)
-        .where(Landlords.status != "deleted")
-        .order_by(Landlords.name)
-    )
-    
-    return (await session.execute(stmt)).scalars().all()
+    return await get_cached_rows(session, ("landlords",), LANDLORDS_STMT)
 
 
 async def get_apartments(
@@ -96,17 +259,11 @@ async def get_apartments(
     landlord_id: Optional[uuid.UUID] = None,
 ) -> list[dict]:
     
-    filters = [Apartments.status != "deleted"]
+    stmt = APARTMENTS_STMT
     if landlord_id:
-        filters.append(Apartments.landlord_id == landlord_id)
-        
-    stmt = (
-        select(Apartments)
-        .where(*filters)
-        .order_by(Apartments.name)
-    )
+        stmt = stmt.where(Apartments.landlord_id == landlord_id)
     
-    return  (await session.execute(stmt)).scalars().all()
+    return await get_cached_rows(session, ("apartments", landlord_id), stmt)
 
 
 async def get_house_units(
@@ -114,14 +271,28 @@ async def get_house_units(
     apartment_id: Optional[uuid.UUID] = None,
 ) -> list[dict]:
     
-    filters = [House_Units.status != "deleted"]
+    stmt = HOUSE_UNITS_STMT
     if apartment_id:
-        filters.append(House_Units.apartment_id == apartment_id)
-        
-    stmt = (
-        select(House_Units)
-        .where(*filters)
-        .order_by(House_Units.name)
-    )
+        stmt = stmt.where(House_Units.apartment_id == apartment_id)
     
-    return (await session.execute(stmt)).scalars().all()
\ No newline at end of file
+    return await get_cached_rows(session, ("house_units", apartment_id), stmt)
+
+
+# Package rows are seeded once and effectively immutable; clear this if a package is edited
+trial_package_cache: dict = {}
+trial_package_lock = asyncio.Lock()
+
+async def get_trial_package(
+    session: AsyncSession,
+) -> tuple[uuid.UUID, int]:
+    if "trial" not in trial_package_cache:
+        async with trial_package_lock:
+            if "trial" not in trial_package_cache:
+                trial = (
+                    await session.execute(
+                        select(Packages.id, Packages.validity).where(Packages.name == "TRIAL")
+                    )
+                ).one()
+                trial_package_cache["trial"] = (trial.id, trial.validity)
+
+    return trial_package_cache["trial"]
@@ -1,61 +1,113 @@
 
 from datetime import date, datetime
-from typing import Optional
-from uuid import UUID, uuid4
-from sqlmodel import SQLModel, Field
+from decimal import Decimal
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import DDL, BigInteger, CheckConstraint, Column, Computed, DateTime, Index, String, event, text
+from sqlmodel import SQLModel, Field, Relationship, func
+
+# Storage options for tables whose rows are edited in place (status changes, end dates):
+# spare room per page keeps updates that don't touch an indexed column HOT, and
+# statistics are refreshed before the status mix drifts far. SQLAlchemy has no
+# table-level WITH (...) option for Postgres, so this runs right after CREATE TABLE
+UPDATE_HEAVY_STORAGE = DDL(
+    "ALTER TABLE %(table)s SET (fillfactor = 90, autovacuum_analyze_scale_factor = 0.02)"
+)
 
 class User_Levels(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     name: str
-    level: int = 0
+    # Defaults are mirrored server-side so raw SQL and bulk inserts can leave them out
+    level: int = Field(default=0, sa_column_kwargs={"server_default": text("0")})
     description: Optional[str]
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
 
 class Landlords(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    __table_args__ = (
+        # Lets the landlord list stream rows in name order without a sort step
+        Index("ix_landlords_active_name", "name", postgresql_where=text("status <> 'deleted'")),
+        CheckConstraint("commission_rate BETWEEN 0 AND 100", name="ck_landlords_commission_rate"),
+    )
+
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     name: str
     phone: str = Field(
         unique=True, 
         index=True
     )
+    # Canonical 2547XXXXXXXX form derived by Postgres from whatever was entered
+    phone_e164: Optional[str] = Field(
+        default=None,
+        sa_column=Column(
+            String,
+            Computed(r"'254' || right(regexp_replace(phone, '\D', '', 'g'), 9)", persisted=True),
+            unique=True,
+            index=True,
+        )
+    )
     id_number: str = Field(
         unique=True, 
         index=True
     )
-    email: str
+    email: str = Field(
+        unique=True, 
+        index=True
+    )
     kra_pin: Optional[str]
     address: Optional[str]
     bank_name: Optional[str]
     bank_account: Optional[str]
-    commission_rate: Optional[float]    
-    status: str = "active"
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    commission_rate: Optional[Decimal] = Field(default=None, max_digits=5, decimal_places=2)
+    status: str = Field(default="active", sa_column_kwargs={"server_default": "active"})
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
+
+    # Lazy loads can't run in async templates; load these explicitly with selectinload()
+    apartments: List["Apartments"] = Relationship(
+        back_populates="landlord",
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
+    licenses: List["Licenses"] = Relationship(
+        back_populates="landlord",
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
         
 class Users(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     name: str
     phone: str = Field(
@@ -77,41 +129,53 @@ class Users(SQLModel, table=True):
         nullable=True
     )
     password: str
-    status: str = "active"
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    status: str = Field(default="active", sa_column_kwargs={"server_default": "active"})
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
         
 class Packages(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     name: str
-    amount: float
-    pay: float
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
+    pay: Decimal = Field(max_digits=12, decimal_places=2)
     validity: int
     color: str = None
     description: Optional[str]
     offer: Optional[str]
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
     
 class Licenses(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     key: str
     package_id: UUID = Field(
@@ -122,124 +186,202 @@ class Licenses(SQLModel, table=True):
         foreign_key="landlords.id", 
         index=True
     )      
-    expires_at: datetime
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True))
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
+
+    landlord: Optional["Landlords"] = Relationship(
+        back_populates="licenses",
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
                     
 class Apartments(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    __table_args__ = (
+        # Covers the per-landlord apartment count subquery
+        Index("ix_apartments_landlord_id_status", "landlord_id", "status"),
+        CheckConstraint(
+            "water_unit_rate >= 0 AND garbage_charge >= 0 AND service_charge >= 0",
+            name="ck_apartments_charges_non_negative",
+        ),
+    )
+
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     name: str
     location: str
     landlord_id: UUID = Field(
-        foreign_key="landlords.id", 
-        index=True
+        foreign_key="landlords.id"
     )    
-    water_unit_rate: Optional[float] 
-    garbage_charge: Optional[float] 
-    service_charge: Optional[float] 
-    status: str = "active" 
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    water_unit_rate: Decimal = Field(max_digits=12, decimal_places=2)
+    garbage_charge: Decimal = Field(max_digits=12, decimal_places=2)
+    service_charge: Decimal = Field(max_digits=12, decimal_places=2)
+    status: str = Field(default="active", sa_column_kwargs={"server_default": "active"})
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
+
+    landlord: Optional["Landlords"] = Relationship(
+        back_populates="apartments",
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
                 
 class House_Types(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     name: str
-    status: str = "active"
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    status: str = Field(default="active", sa_column_kwargs={"server_default": "active"})
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
                     
 class House_Units(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    __table_args__ = (
+        # Per-apartment unit lookups always filter on status as well
+        Index("ix_house_units_apartment_id_status", "apartment_id", "status"),
+        CheckConstraint(
+            "rent >= 0 AND rent_deposit >= 0 AND water_deposit >= 0"
+            " AND electricity_deposit >= 0 AND other_deposits >= 0",
+            name="ck_house_units_amounts_non_negative",
+        ),
+    )
+
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     name: str
     apartment_id: UUID = Field(
-        foreign_key="apartments.id", 
-        index=True
+        foreign_key="apartments.id"
     )   
     house_type_id: UUID = Field(
         foreign_key="house_types.id", 
         index=True
     )   
-    status: str = "vacant"
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    rent: Decimal = Field(max_digits=12, decimal_places=2)
+    rent_deposit: Decimal = Field(max_digits=12, decimal_places=2)
+    water_deposit: Decimal = Field(default=0, max_digits=12, decimal_places=2, sa_column_kwargs={"server_default": text("0")})
+    electricity_deposit: Decimal = Field(default=0, max_digits=12, decimal_places=2, sa_column_kwargs={"server_default": text("0")})
+    other_deposits: Decimal = Field(default=0, max_digits=12, decimal_places=2, sa_column_kwargs={"server_default": text("0")})
+    status: str = Field(default="vacant", sa_column_kwargs={"server_default": "vacant"})
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
 
+    apartment: Optional["Apartments"] = Relationship(
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
+
 class Deposits(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     name: str
     house_unit_id: Optional[UUID] = Field(
         foreign_key="house_units.id", 
         index=True
     )   
-    amount: Optional[float] 
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    amount: Optional[Decimal] = Field(default=None, max_digits=12, decimal_places=2)
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
 
 class Monthly_Fixed_Charges(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     name: str
     house_unit_id: Optional[UUID] = Field(
         foreign_key="house_units.id", 
         index=True
     )   
-    amount: Optional[float] 
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    amount: Optional[Decimal] = Field(default=None, max_digits=12, decimal_places=2)
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
 
 class Tenants(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    __table_args__ = (
+        # Status-filtered and default (non-deleted) tenant lists both come back in name order
+        Index("ix_tenants_status_name", "status", "name"),
+        Index("ix_tenants_active_name", "name", postgresql_where=text("status <> 'deleted'")),
+    )
+
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     name: str
     phone: str = Field(
@@ -255,20 +397,40 @@ class Tenants(SQLModel, table=True):
     next_of_kin_phone: Optional[str]
     occupation: Optional[str]
     employer: Optional[str]
-    status: str = "unassigned"
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    house_unit_id: Optional[UUID] = Field(
+        default=None,
+        foreign_key="house_units.id", 
+        index=True
+    )   
+    status: str = Field(default="unassigned", sa_column_kwargs={"server_default": "unassigned"})
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
 
+    house_unit: Optional["House_Units"] = Relationship(
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
+
 class Occupancy(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    __table_args__ = (
+        # Current occupant of a unit; ended occupancies stay out of the index
+        Index("ix_occupancy_active_house_unit_id", "house_unit_id", postgresql_where=text("end_date IS NULL")),
+    )
+
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     house_unit_id: Optional[UUID] = Field(
         foreign_key="house_units.id", 
@@ -280,57 +442,137 @@ class Occupancy(SQLModel, table=True):
     )   
     start_date: Optional[date]
     end_date: Optional[date]
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
+
+    # Loaded in bulk with selectinload() where a list needs them; never per row
+    tenant: Optional["Tenants"] = Relationship(
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
+    house_unit: Optional["House_Units"] = Relationship(
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
+    bills: List["Bills"] = Relationship(
+        back_populates="occupancy",
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
+    payments: List["Payments"] = Relationship(
+        back_populates="occupancy",
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
     
 class Bills(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    __table_args__ = (
+        # An occupancy's bills in date order straight from the index
+        Index("ix_bills_occupancy_id_created_at", "occupancy_id", "created_at"),
+        # Rows arrive in time order, so a BRIN summary prunes date-range reports for a few pages of index
+        Index("brin_bills_created_at", "created_at", postgresql_using="brin"),
+        CheckConstraint(
+            "previous_reading >= 0 AND current_reading >= 0 AND rate >= 0",
+            name="ck_bills_readings_non_negative",
+        ),
+        # Monthly range partitions, created by utils.database.ensure_partitions
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     name: str
     occupancy_id: Optional[UUID] = Field(
-        foreign_key="occupancy.id", 
-        index=True
+        foreign_key="occupancy.id"
     )   
     start_date: Optional[date]
     end_date: Optional[date]
-    previous_reading: Optional[float] 
-    current_reading: Optional[float] 
-    rate: Optional[float] 
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    previous_reading: Optional[Decimal] = Field(default=None, max_digits=10, decimal_places=4)
+    current_reading: Optional[Decimal] = Field(default=None, max_digits=10, decimal_places=4)
+    rate: Optional[Decimal] = Field(default=None, max_digits=10, decimal_places=4)
+    # Partition key, so Postgres requires it in the primary key
+    created_at: Optional[datetime] = Field(
+        default=None,
+        primary_key=True,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
+
+    occupancy: Optional["Occupancy"] = Relationship(
+        back_populates="bills",
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
     
 class Payments(SQLModel, table=True):
-    id: UUID = Field(
-        default_factory=uuid4,
+    __table_args__ = (
+        # An occupancy's payments in date order straight from the index
+        Index("ix_payments_occupancy_id_created_at", "occupancy_id", "created_at"),
+        Index("brin_payments_created_at", "created_at", postgresql_using="brin"),
+        CheckConstraint("amount >= 0", name="ck_payments_amount_non_negative"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Optional[UUID] = Field(
+        default=None,
         primary_key=True,
-        index=True
+        sa_column_kwargs={"server_default": func.gen_random_uuid()}
     )
     tx_id: str
     payment_mode: str
-    amount: float
+    amount: Decimal = Field(max_digits=12, decimal_places=2)
     account: Optional[str]
     account_name: Optional[str]
     occupancy_id: Optional[UUID] = Field(
-        foreign_key="occupancy.id", 
-        index=True
+        foreign_key="occupancy.id"
     )  
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        nullable=False
+    # Partition key, so Postgres requires it in the primary key
+    created_at: Optional[datetime] = Field(
+        default=None,
+        primary_key=True,
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()}
     )
     created_by: UUID 
-    updated_at: Optional[datetime]
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": func.now()}
+    )
     updated_by: Optional[UUID]
+
+    occupancy: Optional["Occupancy"] = Relationship(
+        back_populates="payments",
+        sa_relationship_kwargs={"lazy": "raise"}
+    )
+
+class Cache_Versions(SQLModel, table=True):
+    # One counter per cached data set. Writers bump it inside their own transaction,
+    # so every worker sees the change the moment it commits
+    name: str = Field(primary_key=True)
+    version: int = Field(
+        default=0,
+        sa_type=BigInteger,
+        sa_column_kwargs={"server_default": text("0")}
+    )
+
+for model in (Landlords, House_Units, Tenants, Occupancy):
+    event.listen(model.__table__, "after_create", UPDATE_HEAVY_STORAGE)